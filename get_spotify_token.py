@@ -102,7 +102,7 @@ def get_spotify_token():
     }
     
     try:
-        response = requests.post(token_url, headers=headers, data=data)
+        response = requests.post(token_url, headers=headers, data=data, timeout=10)
         response.raise_for_status()
         
         tokens = response.json()
@@ -4,19 +4,174 @@ Spotify Web APIからアクティビティ情報を取得してREADME.mdを更
 """
 
 import os
+import re
 import json
 import logging
+import random
+import hashlib
+import tempfile
+import threading
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional
 from dotenv import load_dotenv
 import httpx
 import base64
 from html import escape
 
+# README.md内のSpotifyセクションのマーカー
+SPOTIFY_SECTION_START = "<!-- SPOTIFY_ACTIVITY_START -->"
+SPOTIFY_SECTION_END = "<!-- SPOTIFY_ACTIVITY_END -->"
+ACTIVITIES_HEADING = "## 🏃‍♀️ Activities"
+
+# README.mdはデコードせずバイト列のまま扱うため、マーカーもバイト列で用意しておく
+_SECTION_START_BYTES = SPOTIFY_SECTION_START.encode('utf-8')
+_SECTION_END_BYTES = SPOTIFY_SECTION_END.encode('utf-8')
+_SECTION_END_LEN = len(_SECTION_END_BYTES)
+_ACTIVITIES_HEADING_BYTES = ACTIVITIES_HEADING.encode('utf-8')
+
+# 上記3つのマーカーを1回の走査で探すための正規表現（グループ番号で種類を判別）
+_README_MARKERS_RE = re.compile(
+    b"(" + re.escape(_SECTION_START_BYTES) + b")|"
+    b"(" + re.escape(_SECTION_END_BYTES) + b")|"
+    b"(" + re.escape(_ACTIVITIES_HEADING_BYTES) + b")"
+)
+
+# 429/5xxや通信エラー時のリトライ設定（指数バックオフ + フルジッター）
+HTTP_MAX_ATTEMPTS = 4
+HTTP_BACKOFF_BASE_SECONDS = 0.5
+HTTP_BACKOFF_MAX_SECONDS = 8.0
+# Retry-Afterがこれより長い場合は待たずに諦める（CIの実行時間を延ばさないため）
+HTTP_RETRY_AFTER_MAX_SECONDS = 60.0
+_RETRYABLE_STATUS_CODES = frozenset((429, 500, 502, 503, 504))
+
+# oEmbedキャッシュの有効期限（秒）。ジャケ写が差し替えられても30日で追従する
+OEMBED_CACHE_TTL_SECONDS = 30 * 24 * 60 * 60
+
+# 画像本体のキャッシュの有効期限（秒）
+IMAGE_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+
+# カード上のジャケ写の最大表示サイズ（px）。これ以上の大きさの画像で最小のものを埋め込む
+ALBUM_ART_MIN_SIZE = 140
+
+# ジャケ写が取得できない場合に使うプレースホルダー画像
+PLACEHOLDER_ART_URL = "https://placehold.co/300x300?text=No+Art"
+
+# SVG/XMLの属性値のエスケープ表（1回の走査で置換する）
+_XML_ATTR_TABLE = str.maketrans({
+    '&': '&amp;',
+    '<': '&lt;',
+    '>': '&gt;',
+    '"': '&quot;'
+})
+
+
+def _data_uri(content: bytes, content_type: str) -> str:
+    """バイト列をBase64のdata URIに変換する"""
+    return f"data:{content_type};base64,{base64.b64encode(content).decode('ascii')}"
+
+
+def _display_width(text: str) -> int:
+    """全角文字（East Asian WidthがW/F）を2、それ以外を1として表示幅を数える"""
+    return sum(2 if unicodedata.east_asian_width(ch) in 'WF' else 1 for ch in text)
+
+
+def _truncate_display(text: str, max_width: int) -> str:
+    """表示幅がmax_widthを超える場合は収まる位置で切り詰めて '...' を付ける"""
+    width = 0
+    for index, ch in enumerate(text):
+        width += 2 if unicodedata.east_asian_width(ch) in 'WF' else 1
+        if width > max_width:
+            return text[:index] + '...'
+    return text
+
+
+# ランキングカードの寸法（上位3曲のカードを横に並べる）
+_RANKING_CARD_WIDTH = 900
+_RANKING_CARD_HEIGHT = 200
+_RANKING_CARD_SPACING = 20
+_RANKING_CARD_WIDTH_SINGLE = (_RANKING_CARD_WIDTH - _RANKING_CARD_SPACING * 2) // 3
+_RANKING_SHINE_WIDTH = _RANKING_CARD_WIDTH_SINGLE * 0.7
+
+# 1位〜3位のランキング番号の色
+_RANK_COLORS = ("#FFD700", "#C0C0C0", "#CD7F32")
+
+# 各カードの座標は順位だけで決まるため事前に計算しておく
+# （カードx, アート中心x, アートx, 番号x, テキストx, ロゴx, シャインx）
+_RANKING_CARD_LAYOUTS = tuple(
+    (x, x + 60, x + 10, x + 22, x + 140, x + _RANKING_CARD_WIDTH_SINGLE - 55, x - 10)
+    for x in (slot * (_RANKING_CARD_WIDTH_SINGLE + _RANKING_CARD_SPACING) for slot in range(3))
+)
+
+# ランキングカードのdefsのうち、トラックに依存しない固定部分
+_RANKING_SVG_STATIC_DEFS = "\n".join((
+    '  <defs>',
+    '    <linearGradient id="cardGradient1" x1="0%" y1="0%" x2="100%" y2="100%">',
+    '      <stop offset="0%" style="stop-color:#1a1a2e;stop-opacity:1" />',
+    '      <stop offset="100%" style="stop-color:#16213e;stop-opacity:1" />',
+    '    </linearGradient>',
+    '    <linearGradient id="cardGradient2" x1="0%" y1="0%" x2="100%" y2="100%">',
+    '      <stop offset="0%" style="stop-color:#2d1b69;stop-opacity:1" />',
+    '      <stop offset="100%" style="stop-color:#11998e;stop-opacity:1" />',
+    '    </linearGradient>',
+    '    <linearGradient id="cardGradient3" x1="0%" y1="0%" x2="100%" y2="100%">',
+    '      <stop offset="0%" style="stop-color:#8B0000;stop-opacity:1" />',
+    '      <stop offset="100%" style="stop-color:#FFD700;stop-opacity:1" />',
+    '    </linearGradient>',
+    '    <linearGradient id="shine" x1="0%" y1="0%" x2="100%" y2="0%">',
+    '      <stop offset="0%" style="stop-color:#FFFFFF;stop-opacity:0.25" />',
+    '      <stop offset="60%" style="stop-color:#FFFFFF;stop-opacity:0.05" />',
+    '      <stop offset="100%" style="stop-color:#FFFFFF;stop-opacity:0" />',
+    '    </linearGradient>',
+    '    <filter id="shadow" x="-20%" y="-20%" width="140%" height="140%">',
+    '      <feDropShadow dx="0" dy="4" stdDeviation="8" flood-color="#000000" flood-opacity="0.3"/>',
+    '    </filter>',
+))
+
+# ランキングカード1枚分の描画テンプレート（ループ内で毎回f-stringを組み立てないよう事前に用意）
+_RANKING_CLIP_TEMPLATE = (
+    '    <clipPath id="artClipRank{i}">\n      <circle cx="{art_cx}" cy="100" r="50" />\n    </clipPath>\n'
+    '    <clipPath id="cardClip{i}">\n      <rect x="{x}" y="0" width="{width}" height="{height}" rx="12" ry="12" />\n    </clipPath>'
+)
+_RANKING_BACKGROUND_TEMPLATE = (
+    '  <!-- カード {i} 背景 -->\n'
+    '  <rect x="{x}" y="0" width="{width}" height="{height}" rx="12" ry="12" fill="url(#cardGradient{i})" filter="url(#shadow)" stroke="#ffffff" stroke-opacity="0.08" stroke-width="1"/>\n'
+    '  <!-- シャイン {i} -->\n'
+    '  <rect x="{shine_x}" y="-10" width="{shine_width}" height="60" fill="url(#shine)" clip-path="url(#cardClip{i})"/>'
+)
+_RANKING_TRACK_TEMPLATE = (
+    '  <!-- アルバムアートワーク {i} -->\n'
+    '  <circle cx="{art_cx}" cy="100" r="50" fill="#333" stroke="#555" stroke-width="2"/>\n'
+    '  <image xlink:href="{image_href}" x="{art_x}" y="50" width="100" height="100" clip-path="url(#artClipRank{i})"/>\n'
+    '  <!-- ランキング番号 {i} -->\n'
+    '  <circle cx="{badge_x}" cy="22" r="14" fill="{rank_color}" opacity="0.95" filter="url(#shadow)"/>\n'
+    '  <text x="{badge_x}" y="22" dominant-baseline="middle" font-family="Arial, sans-serif" font-size="12" font-weight="bold" fill="white" text-anchor="middle">{i}</text>\n'
+    '  <!-- トラック情報 {i} -->\n'
+    '  <text x="{text_x}" y="80" font-family="Arial, sans-serif" font-size="14" font-weight="bold" fill="#ffffff">\n'
+    '    <tspan x="{text_x}">{track_display}</tspan>\n'
+    '  </text>\n'
+    '  \n'
+    '  <text x="{text_x}" y="100" font-family="Arial, sans-serif" font-size="12" fill="#b3b3b3">\n'
+    '    <tspan x="{text_x}">{artist_display}</tspan>\n'
+    '  </text>\n'
+    '  \n'
+    '  <text x="{text_x}" y="120" font-family="Arial, sans-serif" font-size="12" fill="#1db954">\n'
+    '    <tspan x="{text_x}">{play_count_text}</tspan>\n'
+    '  </text>\n'
+    '  <!-- Spotify ロゴ {i} -->\n'
+    '  <image xlink:href="{logo_href}" x="{logo_x}" y="5" width="50" height="50"/>'
+)
+_RANKING_LINK_TEMPLATE = (
+    '  <!-- リンク {i} -->\n'
+    '  <a xlink:href="{href}" target="_blank">\n'
+    '    <rect x="{x}" y="0" width="{width}" height="{height}" fill="transparent"/>\n'
+    '  </a>'
+)
+
 class SpotifyActivityUpdater:
     def __init__(self):
         """Spotify Web APIクライアントを初期化"""
-        # ログ設定
-        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
         self.logger = logging.getLogger(__name__)
         
         # Spotify API認証情報
@@ -30,10 +185,45 @@ class SpotifyActivityUpdater:
         self.api_base_url = "https://api.spotify.com/v1"
         self.auth_base_url = "https://accounts.spotify.com"
         self.access_token: Optional[str] = None
+        # 並行リクエスト時にトークン更新が重複しないようにするロック
+        self._token_lock = threading.Lock()
+        
+        # Spotifyロゴのdata URI（全カードで共通のため一度だけ取得）
+        self._spotify_logo_data_uri: Optional[str] = None
+        self._logo_lock = threading.Lock()
+        
+        # ジャケ写が無い場合のプレースホルダー画像のdata URI（同様に一度だけ取得）
+        self._placeholder_art_data_uri: Optional[str] = None
+        self._placeholder_art_lock = threading.Lock()
+        
+        # oEmbedのサムネイルURLキャッシュ（実行をまたいで再利用し、同じ曲の再取得を省く）
+        self.cache_dir = ".cache"
+        self.oembed_cache_path = os.path.join(self.cache_dir, "oembed.json")
+        self._oembed_cache: Dict[str, Any] = self._load_json_cache(self.oembed_cache_path)
+        self._oembed_cache_updated = False
+        
+        # 画像本体のキャッシュ（URLのハッシュごとに1ファイル）
+        self.image_cache_dir = os.path.join(self.cache_dir, "img")
+        
+        # HTTPクライアント（全リクエストで接続を使い回してTCP/TLSハンドシェイクを削減）
+        # HTTP/2で同一ホストへの並行リクエストを1本の接続に多重化し、
+        # 接続確立の一時的な失敗はトランスポート層で2回までリトライする
+        self.http_client = httpx.Client(
+            transport=httpx.HTTPTransport(
+                http2=True,
+                retries=2,
+                limits=httpx.Limits(max_keepalive_connections=10)
+            ),
+            timeout=10.0,
+            follow_redirects=True,
+            headers={'User-Agent': 'spotify-activity-updater/1.0'}
+        )
         
         # SVGディレクトリの作成
         self.svg_dir = "SVG"
         os.makedirs(self.svg_dir, exist_ok=True)
+        # 保存したSVGのパス（元のファイル名 → ハッシュ付きの相対パス）
+        self.svg_paths: Dict[str, str] = {}
         self.logger.info(f"SVGディレクトリを確認/作成しました: {self.svg_dir}")
         
         # アクセストークンを取得
@@ -57,7 +247,7 @@ class SpotifyActivityUpdater:
                 'Content-Type': 'application/x-www-form-urlencoded'
             }
             
-            response = httpx.post(auth_url, data=data, headers=headers, timeout=10.0)
+            response = self.http_client.post(auth_url, data=data, headers=headers)
             response.raise_for_status()
             
             token_data = response.json()
@@ -76,23 +266,29 @@ class SpotifyActivityUpdater:
     def _api_request(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Spotify APIへのリクエストを実行"""
         if not self.access_token:
-            self._refresh_access_token()
+            with self._token_lock:
+                if not self.access_token:
+                    self._refresh_access_token()
         
         url = f"{self.api_base_url}{endpoint}"
+        used_token = self.access_token
         headers = {
-            'Authorization': f'Bearer {self.access_token}',
+            'Authorization': f'Bearer {used_token}',
             'Content-Type': 'application/json'
         }
         
         try:
-            response = httpx.get(url, headers=headers, params=params, timeout=10.0)
+            response = self._get_with_retry(url, headers=headers, params=params)
             
             # 401エラーの場合はトークンを再取得してリトライ
             if response.status_code == 401:
-                self.logger.warning("アクセストークンが無効です。再取得します。")
-                self._refresh_access_token()
+                with self._token_lock:
+                    # 他のスレッドが既に更新済みなら再取得しない
+                    if self.access_token == used_token:
+                        self.logger.warning("アクセストークンが無効です。再取得します。")
+                        self._refresh_access_token()
                 headers['Authorization'] = f'Bearer {self.access_token}'
-                response = httpx.get(url, headers=headers, params=params, timeout=10.0)
+                response = self._get_with_retry(url, headers=headers, params=params)
             
             response.raise_for_status()
             return response.json()
@@ -122,7 +318,8 @@ class SpotifyActivityUpdater:
                             self.logger.error("  2. または、SPOTIFY_SETUP.md の手順に従ってRefresh Tokenを再取得")
                             self.logger.error("  3. .envファイルまたはGitHub SecretsのSPOTIFY_REFRESH_TOKENを更新")
                             self.logger.error("=" * 60)
-                except:
+                except (ValueError, TypeError, AttributeError):
+                    # エラーボディがJSONでない・想定外の構造の場合は詳細表示を省略
                     pass
             
             self.logger.error(f"Spotify APIリクエストエラー: {status_code} - {error_message}")
@@ -131,19 +328,79 @@ class SpotifyActivityUpdater:
             self.logger.error(f"Spotify APIリクエスト中にエラーが発生しました: {e}")
             raise
     
+    def _get_with_retry(self, url: str, **kwargs) -> httpx.Response:
+        """GETリクエストを実行し、429/5xxや通信エラーの場合は指数バックオフでリトライする。
+        接続確立の失敗はトランスポート層でリトライ済みのため、ここでは再試行しない。
+        429でRetry-Afterヘッダーがあればその秒数だけ待つ（長すぎる場合はリトライしない）。
+        最後の試行のレスポンスはステータスに関わらずそのまま返す（判定は呼び出し側で行う）。
+        """
+        for attempt in range(1, HTTP_MAX_ATTEMPTS):
+            try:
+                response = self.http_client.get(url, **kwargs)
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                raise
+            except httpx.TransportError as e:
+                delay = self._backoff_delay(attempt)
+                self.logger.warning(f"通信エラーのため{delay:.1f}秒後にリトライします ({attempt}/{HTTP_MAX_ATTEMPTS - 1}): {url}: {e}")
+            else:
+                if response.status_code not in _RETRYABLE_STATUS_CODES:
+                    return response
+                delay = self._retry_after_delay(response)
+                if delay is None:
+                    delay = self._backoff_delay(attempt)
+                elif delay > HTTP_RETRY_AFTER_MAX_SECONDS:
+                    self.logger.warning(f"Retry-Afterが長すぎるためリトライしません ({delay:.0f}秒): {url}")
+                    return response
+                self.logger.warning(f"HTTP {response.status_code} のため{delay:.1f}秒後にリトライします ({attempt}/{HTTP_MAX_ATTEMPTS - 1}): {url}")
+            time.sleep(delay)
+        # 最後の試行は結果（または例外）をそのまま呼び出し側に返す
+        return self.http_client.get(url, **kwargs)
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """指数バックオフ（フルジッター）の待ち時間を返す"""
+        return random.uniform(0, min(HTTP_BACKOFF_MAX_SECONDS, HTTP_BACKOFF_BASE_SECONDS * 2 ** (attempt - 1)))
+
+    def _retry_after_delay(self, response: httpx.Response) -> Optional[float]:
+        """429レスポンスのRetry-Afterヘッダー（秒数）を返す。無い・解釈できない場合は None"""
+        if response.status_code != 429:
+            return None
+        try:
+            return max(0.0, float(response.headers.get('Retry-After', '')))
+        except ValueError:
+            return None
+
+    def close(self) -> None:
+        """HTTPクライアントを閉じる"""
+        self.http_client.close()
+
     def _xml_attr(self, value: str) -> str:
         """SVG/XMLの属性用に最低限のエスケープを行う。
         主に &、<、>、" をエスケープして属性値の破損を防ぐ。
         """
         if value is None:
             return ''
-        return (
-            str(value)
-            .replace('&', '&amp;')
-            .replace('<', '&lt;')
-            .replace('>', '&gt;')
-            .replace('"', '&quot;')
-        )
+        return str(value).translate(_XML_ATTR_TABLE)
+
+    def _extract_track_data(self, track: Dict[str, Any]) -> Dict[str, Any]:
+        """Spotify APIのトラックオブジェクトから、カード生成に使う項目だけを抜き出して正規化する"""
+        # アーティスト名を結合（複数アーティストの場合）
+        artists = track.get('artists', [])
+        artist_names = ', '.join([artist.get('name', '') for artist in artists])
+        
+        # アルバム情報を取得
+        album = track.get('album', {})
+        
+        return {
+            'track_name': track.get('name', ''),
+            'artist_name': artist_names,
+            'album_name': album.get('name', ''),
+            'track_id': track.get('id', ''),
+            'album_id': album.get('id', ''),
+            # ジャケ写のURLはレスポンスに含まれているため、追加のリクエストなしで取得できる
+            'album_art_url': self._pick_album_image_url(album.get('images', [])),
+            'external_urls': track.get('external_urls', {}),
+            'popularity': track.get('popularity', 0)
+        }
 
     def get_track_ranking(self, limit: int = 50) -> List[Dict[str, Any]]:
         """
@@ -169,28 +426,8 @@ class SpotifyActivityUpdater:
             if 'items' in response_data and response_data['items']:
                 ranking = []
                 for track in response_data['items']:
-                    # アーティスト名を結合（複数アーティストの場合）
-                    artists = track.get('artists', [])
-                    artist_names = ', '.join([artist.get('name', '') for artist in artists])
-                    
-                    # アルバム情報を取得
-                    album = track.get('album', {})
-                    album_name = album.get('name', '')
-                    album_id = album.get('id', '')
-                    
-                    # 外部URLを取得
-                    external_urls = track.get('external_urls', {})
-                    
-                    track_data = {
-                        'track_name': track.get('name', ''),
-                        'artist_name': artist_names,
-                        'album_name': album_name,
-                        'track_id': track.get('id', ''),
-                        'album_id': album_id,
-                        'external_urls': external_urls,
-                        'popularity': track.get('popularity', 0),
-                        'play_count': 0  # APIからは再生回数は取得できないため0
-                    }
+                    track_data = self._extract_track_data(track)
+                    track_data['play_count'] = 0  # APIからは再生回数は取得できないため0
                     ranking.append(track_data)
                 
                 self.logger.info(f"{len(ranking)}曲のランキングを取得しました")
@@ -263,36 +500,15 @@ class SpotifyActivityUpdater:
             return f"## 🏆 Top Tracks (last 1 month)\n\n{svg_card}"
 
     def _create_ranking_svg_card(self, tracks: List[Dict[str, Any]]) -> str:
-        """ランキング用のSVGカードを生成"""
-        card_width = 900
-        card_height = 200
-        card_spacing = 20
-        card_width_single = (card_width - card_spacing * 2) // 3
+        """ランキング用のSVGカードを生成（tracksは上位3曲分）"""
+        card_width = _RANKING_CARD_WIDTH
+        card_height = _RANKING_CARD_HEIGHT
+        card_width_single = _RANKING_CARD_WIDTH_SINGLE
 
         # SVGヘッダーと基本defs（clipPathは後で動的に追加）
         svg_parts: List[str] = []
         svg_parts.append(f'<svg width="{card_width}" height="{card_height}" xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink">')
-        svg_parts.append('  <defs>')
-        svg_parts.append('    <linearGradient id="cardGradient1" x1="0%" y1="0%" x2="100%" y2="100%">')
-        svg_parts.append('      <stop offset="0%" style="stop-color:#1a1a2e;stop-opacity:1" />')
-        svg_parts.append('      <stop offset="100%" style="stop-color:#16213e;stop-opacity:1" />')
-        svg_parts.append('    </linearGradient>')
-        svg_parts.append('    <linearGradient id="cardGradient2" x1="0%" y1="0%" x2="100%" y2="100%">')
-        svg_parts.append('      <stop offset="0%" style="stop-color:#2d1b69;stop-opacity:1" />')
-        svg_parts.append('      <stop offset="100%" style="stop-color:#11998e;stop-opacity:1" />')
-        svg_parts.append('    </linearGradient>')
-        svg_parts.append('    <linearGradient id="cardGradient3" x1="0%" y1="0%" x2="100%" y2="100%">')
-        svg_parts.append('      <stop offset="0%" style="stop-color:#8B0000;stop-opacity:1" />')
-        svg_parts.append('      <stop offset="100%" style="stop-color:#FFD700;stop-opacity:1" />')
-        svg_parts.append('    </linearGradient>')
-        svg_parts.append('    <linearGradient id="shine" x1="0%" y1="0%" x2="100%" y2="0%">')
-        svg_parts.append('      <stop offset="0%" style="stop-color:#FFFFFF;stop-opacity:0.25" />')
-        svg_parts.append('      <stop offset="60%" style="stop-color:#FFFFFF;stop-opacity:0.05" />')
-        svg_parts.append('      <stop offset="100%" style="stop-color:#FFFFFF;stop-opacity:0" />')
-        svg_parts.append('    </linearGradient>')
-        svg_parts.append('    <filter id="shadow" x="-20%" y="-20%" width="140%" height="140%">')
-        svg_parts.append('      <feDropShadow dx="0" dy="4" stdDeviation="8" flood-color="#000000" flood-opacity="0.3"/>')
-        svg_parts.append('    </filter>')
+        svg_parts.append(_RANKING_SVG_STATIC_DEFS)
 
         # 画像クリップ用clipPathをトラックごとに追加
         clip_defs: List[str] = []
@@ -300,76 +516,77 @@ class SpotifyActivityUpdater:
         # 本体描画パーツ
         body_parts: List[str] = []
 
+        # Spotifyロゴは全カード共通のためループ外で一度だけ用意
+        spotify_logo_href = self._xml_attr(self._get_spotify_logo_data_uri())
+
+        # ジャケ写の取得（oEmbed→画像）はトラックごとに独立しているため並行して実行
+        # データのない枠は描画しないので取得もしない
+        with ThreadPoolExecutor(max_workers=len(tracks) or 1) as executor:
+            image_srcs = list(executor.map(
+                lambda track: self._track_image_src(track) if track.get('track_name') else '',
+                tracks
+            ))
+
+        # ループ内で繰り返し参照するメソッドはローカル変数に束縛して属性参照を省く
+        xml_attr = self._xml_attr
+        parse_external_urls = self._parse_external_urls
+        add_clip_def = clip_defs.append
+        add_body_part = body_parts.append
+
         # 各トラックのカードを生成
-        for i, track in enumerate(tracks, 1):
-            x_pos = (i - 1) * (card_width_single + card_spacing)
+        cards = zip(tracks, image_srcs, _RANKING_CARD_LAYOUTS, _RANK_COLORS)
+        for i, (track, image_src, layout, rank_color) in enumerate(cards, 1):
+            x_pos, art_cx, art_x, badge_x, text_x, logo_x, shine_x = layout
 
             track_name_raw = track.get('track_name', '')
             artist_name_raw = track.get('artist_name', '')
-            album_name_raw = track.get('album_name', '')
-            track_id = track.get('track_id', '')
             external_urls_raw = track.get('external_urls', {})
             play_count = track.get('play_count', 0)
 
-            # HTMLエスケープ
-            track_name = escape(str(track_name_raw)) if track_name_raw else 'No Track'
-            artist_name = escape(str(artist_name_raw)) if artist_name_raw else 'No Artist'
-            album_name = escape(str(album_name_raw)) if album_name_raw else ''
+            track_name = str(track_name_raw) if track_name_raw else 'No Track'
+            artist_name = str(artist_name_raw) if artist_name_raw else 'No Artist'
 
             # external_urlsをJSON文字列から辞書型にキャスト
-            external_urls = self._parse_external_urls(external_urls_raw)
+            external_urls = parse_external_urls(external_urls_raw)
 
             # Spotifyリンクを取得
             spotify_url = ""
             if external_urls and isinstance(external_urls, dict) and 'spotify' in external_urls:
                 spotify_url = external_urls['spotify']
 
-            # ジャケ写のURLを取得
-            album_art_url = ""
-            oembed_target_url = spotify_url or (f"https://open.spotify.com/track/{track_id}" if track_id else "")
-            if oembed_target_url:
-                album_art_url = self._get_album_art_via_oembed(oembed_target_url)
-
-            # 画像はBase64のdata URIで埋め込み（外部参照ブロック対策）
-            image_src = self._image_data_uri(album_art_url)
-
-            # ランキングの色とグラデーション
-            gradient_id = f"cardGradient{i}"
-            rank_color = "#FFD700" if i == 1 else "#C0C0C0" if i == 2 else "#CD7F32"
-
             # 画像用clipPathとカード範囲のclipPathをdefsに追加
-            clip_defs.append(f'    <clipPath id="artClipRank{i}">\n      <circle cx="{x_pos + 60}" cy="100" r="50" />\n    </clipPath>')
-            clip_defs.append(f'    <clipPath id="cardClip{i}">\n      <rect x="{x_pos}" y="0" width="{card_width_single}" height="{card_height}" rx="12" ry="12" />\n    </clipPath>')
+            add_clip_def(_RANKING_CLIP_TEMPLATE.format(
+                i=i, x=x_pos, art_cx=art_cx, width=card_width_single, height=card_height
+            ))
 
             # カードの背景（縁取り + シャイン）
-            body_parts.append(f'  <!-- カード {i} 背景 -->\n  <rect x="{x_pos}" y="0" width="{card_width_single}" height="{card_height}" rx="12" ry="12" fill="url(#{gradient_id})" filter="url(#shadow)" stroke="#ffffff" stroke-opacity="0.08" stroke-width="1"/>')
-            body_parts.append(f'  <!-- シャイン {i} -->\n  <rect x="{x_pos - 10}" y="-10" width="{card_width_single * 0.7}" height="60" fill="url(#shine)" clip-path="url(#cardClip{i})"/>')
+            add_body_part(_RANKING_BACKGROUND_TEMPLATE.format(
+                i=i, x=x_pos, shine_x=shine_x, width=card_width_single, height=card_height,
+                shine_width=_RANKING_SHINE_WIDTH
+            ))
 
             if track_name_raw:  # データがある場合のみ表示
-                # アルバムアートワーク
-                body_parts.append(f'  <!-- アルバムアートワーク {i} -->\n  <circle cx="{x_pos + 60}" cy="100" r="50" fill="#333" stroke="#555" stroke-width="2"/>\n  <image xlink:href="{self._xml_attr(image_src)}" x="{x_pos + 10}" y="50" width="100" height="100" clip-path="url(#artClipRank{i})"/>')
-
-                # ランキング番号（カード左上に配置して重なりを防ぐ）
-                body_parts.append(
-                    f'  <!-- ランキング番号 {i} -->\n'
-                    f'  <circle cx="{x_pos + 22}" cy="22" r="14" fill="{rank_color}" opacity="0.95" filter="url(#shadow)"/>\n'
-                    f'  <text x="{x_pos + 22}" y="22" dominant-baseline="middle" font-family="Arial, sans-serif" font-size="12" font-weight="bold" fill="white" text-anchor="middle">{i}</text>'
-                )
-
-                # トラック情報
-                track_display = track_name[:20] + ('...' if len(track_name) > 20 else '')
-                artist_display = artist_name[:25] + ('...' if len(artist_name) > 25 else '')
+                # トラック情報（全角文字は2文字分として表示幅で切り詰めてからHTMLエスケープ）
+                track_display = escape(_truncate_display(track_name, 20))
+                artist_display = escape(_truncate_display(artist_name, 25))
                 # play_countが0の場合は表示しない（APIからは再生回数が取得できないため）
                 play_count_text = f'🔥 {play_count} plays' if play_count > 0 else '⭐ Top Track'
-                body_parts.append(f'  <!-- トラック情報 {i} -->\n  <text x="{x_pos + 140}" y="80" font-family="Arial, sans-serif" font-size="14" font-weight="bold" fill="#ffffff">\n    <tspan x="{x_pos + 140}">{track_display}</tspan>\n  </text>\n  \n  <text x="{x_pos + 140}" y="100" font-family="Arial, sans-serif" font-size="12" fill="#b3b3b3">\n    <tspan x="{x_pos + 140}">{artist_display}</tspan>\n  </text>\n  \n  <text x="{x_pos + 140}" y="120" font-family="Arial, sans-serif" font-size="12" fill="#1db954">\n    <tspan x="{x_pos + 140}">{play_count_text}</tspan>\n  </text>')
 
-                # Spotify ロゴ
-                spotify_logo_data = self._get_spotify_logo_data_uri()
-                body_parts.append(f'  <!-- Spotify ロゴ {i} -->\n  <image xlink:href="{self._xml_attr(spotify_logo_data)}" x="{x_pos + card_width_single - 55}" y="5" width="50" height="50"/>')
+                # アルバムアートワーク・ランキング番号・トラック情報・Spotifyロゴ
+                add_body_part(_RANKING_TRACK_TEMPLATE.format(
+                    i=i, art_cx=art_cx, art_x=art_x, image_href=xml_attr(image_src),
+                    badge_x=badge_x, rank_color=rank_color, text_x=text_x,
+                    track_display=track_display, artist_display=artist_display,
+                    play_count_text=play_count_text, logo_href=spotify_logo_href,
+                    logo_x=logo_x
+                ))
 
                 # リンク（透明なオーバーレイ）
                 if spotify_url:
-                    body_parts.append(f'  <!-- リンク {i} -->\n  <a xlink:href="{self._xml_attr(spotify_url)}" target="_blank">\n    <rect x="{x_pos}" y="0" width="{card_width_single}" height="{card_height}" fill="transparent"/>\n  </a>')
+                    add_body_part(_RANKING_LINK_TEMPLATE.format(
+                        i=i, href=xml_attr(spotify_url), x=x_pos,
+                        width=card_width_single, height=card_height
+                    ))
 
         # 追加のclipPath定義をdefsに入れて閉じる
         svg_parts.extend(clip_defs)
@@ -381,6 +598,27 @@ class SpotifyActivityUpdater:
 
         return "\n".join(svg_parts)
 
+    def _track_image_src(self, track: Dict[str, Any]) -> str:
+        """トラックのジャケ写を取得し、埋め込み用のdata URIを返す"""
+        external_urls = self._parse_external_urls(track.get('external_urls', {}))
+        spotify_url = external_urls.get('spotify', '') if isinstance(external_urls, dict) else ''
+
+        # 画像はBase64のdata URIで埋め込み（外部参照ブロック対策）
+        return self._image_data_uri(self._resolve_album_art_url(track, spotify_url))
+
+    def _resolve_album_art_url(self, track: Dict[str, Any], spotify_url: str) -> str:
+        """トラックのジャケ写URLを返す。
+        APIレスポンスのジャケ写URLを優先し、無い場合のみoEmbedで取得する。
+        """
+        album_art_url = track.get('album_art_url', '')
+        if album_art_url:
+            return album_art_url
+        track_id = track.get('track_id', '')
+        oembed_target_url = spotify_url or (f"https://open.spotify.com/track/{track_id}" if track_id else "")
+        if not oembed_target_url:
+            return ""
+        return self._get_album_art_via_oembed(oembed_target_url)
+
     def get_latest_track(self) -> Optional[Dict[str, Any]]:
         """Spotify Web APIから直近で再生した最新トラックを1件取得して返す。
         取得に失敗した場合は None を返す。
@@ -398,30 +636,8 @@ class SpotifyActivityUpdater:
             if 'items' in response_data and response_data['items']:
                 # 最新のトラックを取得
                 latest_item = response_data['items'][0]
-                track = latest_item.get('track', {})
-                
-                # アーティスト名を結合（複数アーティストの場合）
-                artists = track.get('artists', [])
-                artist_names = ', '.join([artist.get('name', '') for artist in artists])
-                
-                # アルバム情報を取得
-                album = track.get('album', {})
-                album_name = album.get('name', '')
-                album_id = album.get('id', '')
-                
-                # 外部URLを取得
-                external_urls = track.get('external_urls', {})
-                
-                track_data = {
-                    'track_name': track.get('name', ''),
-                    'artist_name': artist_names,
-                    'album_name': album_name,
-                    'track_id': track.get('id', ''),
-                    'album_id': album_id,
-                    'external_urls': external_urls,
-                    'popularity': track.get('popularity', 0),
-                    'played_at': latest_item.get('played_at', '')
-                }
+                track_data = self._extract_track_data(latest_item.get('track', {}))
+                track_data['played_at'] = latest_item.get('played_at', '')
                 
                 self.logger.info(f"最新トラックを取得しました: {track_data.get('track_name')} - {track_data.get('artist_name')}")
                 return track_data
@@ -463,22 +679,18 @@ class SpotifyActivityUpdater:
         track_name_raw = latest_track.get('track_name', 'Unknown Track')
         artist_name_raw = latest_track.get('artist_name', 'Unknown Artist')
         album_name_raw = latest_track.get('album_name', '')
-        track_id = latest_track.get('track_id', '')
         external_urls_raw = latest_track.get('external_urls', {})
 
-        track_name = escape(str(track_name_raw))
-        artist_name = escape(str(artist_name_raw))
-        album_name = escape(str(album_name_raw))
+        track_name = str(track_name_raw)
+        artist_name = str(artist_name_raw)
+        album_name = str(album_name_raw)
 
         external_urls = self._parse_external_urls(external_urls_raw)
         spotify_url = ""
         if external_urls and isinstance(external_urls, dict) and 'spotify' in external_urls:
             spotify_url = external_urls['spotify']
 
-        album_art_url = ""
-        oembed_target_url = spotify_url or (f"https://open.spotify.com/track/{track_id}" if track_id else "")
-        if oembed_target_url:
-            album_art_url = self._get_album_art_via_oembed(oembed_target_url)
+        album_art_url = self._resolve_album_art_url(latest_track, spotify_url)
 
         # SVGカードを生成
         svg_card = self._create_latest_track_svg_card(
@@ -500,9 +712,9 @@ class SpotifyActivityUpdater:
             return f"{title}\n\n{svg_card}"
 
     def _create_latest_track_svg_card(self, track_name: str, artist_name: str, album_name: str, album_art_url: str, spotify_url: str) -> str:
-        """最新トラック用のSVGカードを生成"""
-        # テキストの長さに応じてカードの幅を調整
-        max_text_length = max(len(track_name), len(artist_name)) * 8
+        """最新トラック用のSVGカードを生成（各テキストはエスケープ前の文字列を受け取る）"""
+        # テキストの表示幅に応じてカードの幅を調整
+        max_text_length = max(_display_width(track_name), _display_width(artist_name)) * 8
         card_width = max(400, min(600, max_text_length + 200))
         card_height = 180
         
@@ -546,11 +758,11 @@ class SpotifyActivityUpdater:
   
   <!-- トラック情報 -->
   <text x="200" y="60" font-family="Arial, sans-serif" font-size="20" font-weight="bold" fill="#ffffff">
-    <tspan x="200">{track_name[:30]}{'...' if len(track_name) > 30 else ''}</tspan>
+    <tspan x="200">{escape(_truncate_display(track_name, 30))}</tspan>
   </text>
   
   <text x="200" y="90" font-family="Arial, sans-serif" font-size="14" fill="#b3b3b3">
-    <tspan x="200">{artist_name[:35]}{'...' if len(artist_name) > 35 else ''}</tspan>
+    <tspan x="200">{escape(_truncate_display(artist_name, 35))}</tspan>
   </text>
   
   <!-- Spotify ロゴ -->
@@ -583,19 +795,37 @@ class SpotifyActivityUpdater:
         return svg_content
 
     def _save_svg_file(self, svg_content: str, filename: str) -> str:
-        """SVGコンテンツをファイルに保存し、相対パスを返す"""
-        filepath = os.path.join(self.svg_dir, filename)
+        """SVGコンテンツをファイルに保存し、相対パスを返す。
+        ファイル名には内容のハッシュを付け（例: track_ranking.<hash>.svg）、
+        内容が変わったときだけREADMEの参照先が変わるようにしてGitHubの画像キャッシュを回避する。
+        保存したパスは self.svg_paths に元のファイル名をキーとして記録する。
+        """
+        data = svg_content.encode('utf-8')
+        stem, ext = os.path.splitext(filename)
+        digest = hashlib.blake2b(data, digest_size=6).hexdigest()
+        hashed_filename = f"{stem}.{digest}{ext}"
+        filepath = os.path.join(self.svg_dir, hashed_filename)
+        relative_path = f"{self.svg_dir}/{hashed_filename}"
         try:
             # SVGディレクトリが存在しない場合は作成
             os.makedirs(self.svg_dir, exist_ok=True)
             
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(svg_content)
+            # 既存ファイルと同じ内容なら書き込まない（不要な差分を防ぐ）
+            if self._read_bytes_if_exists(filepath) == data:
+                self.logger.info(f"SVGファイルに変更がないため書き込みをスキップしました: {filepath}")
+                self.svg_paths[filename] = relative_path
+                self._remove_stale_svg_files(filename, hashed_filename)
+                return relative_path
+            
+            # 書き込み途中のファイルが読まれないよう、一時ファイル経由で置き換える
+            self._write_file_atomic(filepath, data)
             self.logger.info(f"SVGファイルを保存しました: {filepath}")
             
             # ファイルが実際に作成されたか確認
             if os.path.exists(filepath) and os.path.getsize(filepath) > 0:
-                return f"{self.svg_dir}/{filename}"
+                self.svg_paths[filename] = relative_path
+                self._remove_stale_svg_files(filename, hashed_filename)
+                return relative_path
             else:
                 self.logger.error(f"SVGファイルの保存に失敗しました: {filepath}")
                 raise Exception(f"SVGファイルの保存に失敗しました: {filepath}")
@@ -604,11 +834,61 @@ class SpotifyActivityUpdater:
             self.logger.error(f"SVGファイルの保存中にエラーが発生しました: {e}")
             raise Exception(f"SVGファイルの保存中にエラーが発生しました: {e}")
 
+    def _remove_stale_svg_files(self, filename: str, current_filename: str) -> None:
+        """同じカードの古いハッシュ付きファイル（およびハッシュなしの旧ファイル）を削除する"""
+        stem, ext = os.path.splitext(filename)
+        stale_pattern = re.compile(rf"{re.escape(stem)}(\.[0-9a-f]{{12}})?{re.escape(ext)}")
+        for entry in os.scandir(self.svg_dir):
+            if entry.name != current_filename and stale_pattern.fullmatch(entry.name):
+                try:
+                    os.unlink(entry.path)
+                    self.logger.info(f"古いSVGファイルを削除しました: {entry.path}")
+                except OSError as e:
+                    self.logger.warning(f"古いSVGファイルの削除に失敗しました: {entry.path}: {e}")
+
+    def _read_bytes_if_exists(self, filepath: str) -> Optional[bytes]:
+        """ファイルが存在すれば内容をバイト列で返し、存在しなければ None を返す"""
+        try:
+            with open(filepath, 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _write_file_atomic(self, filepath: str, data: bytes) -> None:
+        """同じディレクトリの一時ファイルに書き込んでから os.replace で置き換える"""
+        directory = os.path.dirname(os.path.abspath(filepath))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(filepath)}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            # mkstempは0600で作成するため、既存ファイルの権限を引き継ぐ
+            try:
+                mode = os.stat(filepath).st_mode & 0o777
+            except FileNotFoundError:
+                mode = 0o644
+            os.chmod(tmp_path, mode)
+            os.replace(tmp_path, filepath)
+        except BaseException:
+            # 失敗した場合は一時ファイルを残さない
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
 
     def _get_spotify_logo_data_uri(self) -> str:
         """Spotifyの実際のロゴ画像をBase64のdata URIとして返す。
         複数のソースからSpotifyロゴを取得を試行し、失敗時はSVGフォールバックを使用。
+        一度取得した結果はインスタンス内で使い回す。
         """
+        with self._logo_lock:
+            if self._spotify_logo_data_uri is None:
+                self._spotify_logo_data_uri = self._fetch_spotify_logo_data_uri()
+        return self._spotify_logo_data_uri
+
+    def _fetch_spotify_logo_data_uri(self) -> str:
+        """複数のソースからSpotifyロゴを取得してdata URIに変換する"""
         # Spotifyロゴの複数のソース（公式CDNやブランドリソース）
         logo_urls = [
             "https://storage.googleapis.com/pr-newsroom-wp/1/2018/11/Spotify_Logo_CMYK_Green.png",
@@ -619,20 +899,18 @@ class SpotifyActivityUpdater:
         
         for url in logo_urls:
             try:
-                self.logger.debug(f"Spotifyロゴの取得を試行: {url}")
-                response = httpx.get(url, timeout=10.0, follow_redirects=True)
+                self.logger.debug("Spotifyロゴの取得を試行: %s", url)
+                response = self.http_client.get(url)
                 
                 if response.status_code == 200 and response.content:
                     # 画像のContent-Typeを確認
                     content_type = response.headers.get("Content-Type", "image/png")
                     
-                    # Base64エンコード
-                    b64 = base64.b64encode(response.content).decode('ascii')
                     self.logger.info(f"Spotifyロゴを正常に取得しました: {url}")
-                    return f"data:{content_type};base64,{b64}"
+                    return _data_uri(response.content, content_type)
                     
             except Exception as e:
-                self.logger.debug(f"ロゴ取得失敗 ({url}): {e}")
+                self.logger.debug("ロゴ取得失敗 (%s): %s", url, e)
                 continue
         
         # すべてのURLで失敗した場合はSVGフォールバック
@@ -647,9 +925,7 @@ class SpotifyActivityUpdater:
         </svg>'''
         
         try:
-            svg_bytes = spotify_logo_svg.encode('utf-8')
-            b64 = base64.b64encode(svg_bytes).decode('ascii')
-            return f"data:image/svg+xml;base64,{b64}"
+            return _data_uri(spotify_logo_svg.encode('utf-8'), "image/svg+xml")
         except Exception as e:
             self.logger.error(f"SVGフォールバックの生成中にエラーが発生しました: {e}")
             # 最終フォールバック: 音符絵文字
@@ -657,40 +933,53 @@ class SpotifyActivityUpdater:
                 <circle cx="12" cy="12" r="12" fill="#1db954"/>
                 <text x="12" y="16" font-family="Arial" font-size="12" fill="white" text-anchor="middle">♪</text>
             </svg>'''
-            svg_bytes = fallback_svg.encode('utf-8')
-            b64 = base64.b64encode(svg_bytes).decode('ascii')
-            return f"data:image/svg+xml;base64,{b64}"
+            return _data_uri(fallback_svg.encode('utf-8'), "image/svg+xml")
+
+    def _get_placeholder_art_data_uri(self) -> str:
+        """ジャケ写が無い場合のプレースホルダー画像をdata URIで返す。
+        どのカードでも同じ画像なので、取得に成功した結果はインスタンス内で使い回す。
+        取得に失敗した場合は例外を送出する。
+        """
+        with self._placeholder_art_lock:
+            if self._placeholder_art_data_uri is None:
+                fb = self._get_with_retry(PLACEHOLDER_ART_URL)
+                fb.raise_for_status()
+                content_type = fb.headers.get("Content-Type", "image/png")
+                self._placeholder_art_data_uri = _data_uri(fb.content, content_type)
+        return self._placeholder_art_data_uri
 
     def _image_data_uri(self, source_url: str) -> str:
         """画像を取得し、Base64のdata URIとして返す。
         - 外部参照がブロックされる環境（READMEやローカルビューア）でも表示できるようにするため。
-        - Spotifyの画像URLを直接使用して最高品質を維持。
-        - リサイズはSVG側で行うため、元画像の品質をそのまま保持。
+        - 渡されるURLは、通常は表示サイズ以上で最小のSpotify画像（_pick_album_image_url で選択）、
+          APIレスポンスに画像が無い場合はoEmbedのサムネイル画像（_resolve_album_art_url を参照）。
+        - 再エンコードはせず、表示サイズへの縮小はSVG側で行う。
         失敗時はプレースホルダー画像を使う。
         """
         try:
             if not source_url:
                 # プレースホルダー画像を使用
-                fb = httpx.get("https://placehold.co/300x300?text=No+Art", timeout=10.0, follow_redirects=True)
-                fb.raise_for_status()
-                content = fb.content
-                content_type = fb.headers.get("Content-Type", "image/png")
-            else:
-                # Spotifyの画像URLを直接使用（最高品質）
-                self.logger.debug(f"画像URLを直接使用: {source_url}")
-                resp = httpx.get(source_url, timeout=10.0, follow_redirects=True)
-                if resp.status_code == 200 and resp.content:
-                    content = resp.content
-                    content_type = resp.headers.get("Content-Type", "image/jpeg")
-                else:
-                    # フォールバック
-                    fb = httpx.get("https://placehold.co/300x300?text=No+Art", timeout=10.0, follow_redirects=True)
-                    fb.raise_for_status()
-                    content = fb.content
-                    content_type = fb.headers.get("Content-Type", "image/png")
-
-            b64 = base64.b64encode(content).decode("ascii")
-            return f"data:{content_type};base64,{b64}"
+                return self._get_placeholder_art_data_uri()
+
+            # 有効期限内のキャッシュがあればネットワークにアクセスしない
+            cache_path = self._image_cache_path(source_url)
+            cached = self._load_cache_entry(cache_path, IMAGE_CACHE_TTL_SECONDS)
+            if cached is not None:
+                return cached
+
+            # Spotifyの画像URLをそのまま取得（再エンコードしない）
+            self.logger.debug("画像URLを直接使用: %s", source_url)
+            resp = self._get_with_retry(source_url)
+            if resp.status_code != 200 or not resp.content:
+                # フォールバック
+                return self._get_placeholder_art_data_uri()
+
+            data_uri = _data_uri(resp.content, resp.headers.get("Content-Type", "image/jpeg"))
+            self._save_cache_entry(cache_path, {
+                'data_uri': data_uri,
+                'cached_at': time.time()
+            })
+            return data_uri
         except Exception:
             # 追加のフォールバック（空の1px）
             transparent_png_base64 = (
@@ -699,18 +988,92 @@ class SpotifyActivityUpdater:
             )
             return f"data:image/png;base64,{transparent_png_base64}"
     
+    def _image_cache_path(self, source_url: str) -> str:
+        """画像URLに対応するキャッシュファイルのパスを返す"""
+        digest = hashlib.blake2b(source_url.encode('utf-8'), digest_size=16).hexdigest()
+        return os.path.join(self.image_cache_dir, f"{digest}.json")
+
+    def _load_cache_entry(self, path: str, ttl: float) -> Optional[str]:
+        """画像キャッシュファイルを読み込み、有効期限内であればdata URIを返す。
+        存在しない・壊れている（型が不正なものを含む）・期限切れの場合は None を返す。
+        """
+        if not os.path.exists(path):
+            return None
+        entry = self._load_json_cache(path)
+        data_uri = entry.get('data_uri')
+        cached_at = entry.get('cached_at')
+        if (
+            isinstance(data_uri, str)
+            and data_uri
+            and isinstance(cached_at, (int, float))
+            and time.time() - cached_at < ttl
+        ):
+            return data_uri
+        return None
+
+    def _save_cache_entry(self, path: str, entry: Dict[str, Any]) -> None:
+        """キャッシュファイルを保存する（失敗しても処理は継続）"""
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._write_file_atomic(path, json.dumps(entry).encode('utf-8'))
+        except OSError as e:
+            self.logger.warning(f"キャッシュファイルの保存に失敗しました: {path}: {e}")
+
+    def _prune_image_cache(self) -> None:
+        """期限切れの画像キャッシュを削除する（ランキングから外れた曲の画像が溜まらないようにする）"""
+        try:
+            entries = list(os.scandir(self.image_cache_dir))
+        except FileNotFoundError:
+            return
+        now = time.time()
+        for entry in entries:
+            try:
+                if now - entry.stat().st_mtime >= IMAGE_CACHE_TTL_SECONDS:
+                    os.unlink(entry.path)
+            except OSError as e:
+                self.logger.warning(f"画像キャッシュの削除に失敗しました: {entry.path}: {e}")
+
+    def _pick_album_image_url(self, images: List[Dict[str, Any]]) -> str:
+        """アルバム画像の一覧から埋め込みに使う画像URLを選ぶ。
+        カードの表示サイズ以上の画像のうち最も小さいものを選び、埋め込むバイト数を抑える。
+        （通常は640px/300px/64pxの3種類が返り、300pxが選ばれる）
+        該当するものが無ければ最初の画像を使う。
+        """
+        if not isinstance(images, list):
+            return ""
+        candidates = [image for image in images if isinstance(image, dict) and image.get('url')]
+        if not candidates:
+            return ""
+        large_enough = [
+            image for image in candidates
+            if isinstance(image.get('width'), int) and image['width'] >= ALBUM_ART_MIN_SIZE
+        ]
+        if large_enough:
+            return min(large_enough, key=lambda image: image['width'])['url']
+        return candidates[0]['url']
+
     def _get_album_art_via_oembed(self, spotify_url: str) -> str:
         """Spotify oEmbed APIからthumbnail_urlを取得して返す。
         ネットワークエラーや予期しないレスポンス時は空文字を返す。
         """
         if not spotify_url:
             return ""
+
+        # 有効期限内のキャッシュがあればネットワークにアクセスしない
+        cached = self._oembed_cache.get(spotify_url)
+        if (
+            isinstance(cached, dict)
+            and isinstance(cached.get('thumbnail_url'), str)
+            and cached['thumbnail_url']
+            and isinstance(cached.get('cached_at'), (int, float))
+            and time.time() - cached['cached_at'] < OEMBED_CACHE_TTL_SECONDS
+        ):
+            return cached['thumbnail_url']
+
         try:
-            response = httpx.get(
+            response = self._get_with_retry(
                 "https://open.spotify.com/oembed",
                 params={"url": spotify_url},
-                timeout=10.0,
-                follow_redirects=True,
             )
             if response.status_code != 200:
                 self.logger.warning(f"oEmbedの取得に失敗しました (status={response.status_code}) url={spotify_url}")
@@ -718,23 +1081,55 @@ class SpotifyActivityUpdater:
             data = response.json()
             thumbnail_url = data.get("thumbnail_url", "")
             if isinstance(thumbnail_url, str):
+                if thumbnail_url:
+                    self._oembed_cache[spotify_url] = {
+                        'thumbnail_url': thumbnail_url,
+                        'cached_at': time.time()
+                    }
+                    self._oembed_cache_updated = True
                 return thumbnail_url
             return ""
         except Exception as e:
             self.logger.warning(f"oEmbed取得中に例外が発生しました: {e}")
             return ""
 
-    def _get_rank_emoji(self, rank: int) -> str:
-        """ランキングに応じた絵文字を返す"""
-        if rank == 1:
-            return "🥇"
-        elif rank == 2:
-            return "🥈"
-        elif rank == 3:
-            return "🥉"
-        else:
-            return "🎵"
-    
+    def _load_json_cache(self, path: str) -> Dict[str, Any]:
+        """JSON形式のキャッシュファイルを読み込む。存在しない・壊れている場合は空の辞書を返す"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                return data
+            self.logger.warning(f"キャッシュファイルの形式が不正なため無視します: {path}")
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"キャッシュファイルの読み込みに失敗しました: {path}: {e}")
+        return {}
+
+    def _save_oembed_cache(self) -> None:
+        """oEmbedキャッシュに追加・期限切れがあればファイルに保存する（失敗しても処理は継続）
+        期限切れのエントリは保存時に取り除き、キャッシュが肥大化しないようにする。
+        """
+        now = time.time()
+        fresh_cache = {
+            url: entry for url, entry in self._oembed_cache.items()
+            if isinstance(entry, dict)
+            and isinstance(entry.get('cached_at'), (int, float))
+            and now - entry['cached_at'] < OEMBED_CACHE_TTL_SECONDS
+        }
+        if not self._oembed_cache_updated and len(fresh_cache) == len(self._oembed_cache):
+            return
+        self._oembed_cache = fresh_cache
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            data = json.dumps(self._oembed_cache, ensure_ascii=False, indent=2).encode('utf-8')
+            self._write_file_atomic(self.oembed_cache_path, data)
+            self._oembed_cache_updated = False
+            self.logger.info(f"oEmbedキャッシュを保存しました: {self.oembed_cache_path}")
+        except OSError as e:
+            self.logger.warning(f"oEmbedキャッシュの保存に失敗しました: {e}")
+
     def _parse_external_urls(self, external_urls_raw) -> Dict[str, Any]:
         """
         external_urlsをJSON文字列から辞書型にキャスト
@@ -745,17 +1140,15 @@ class SpotifyActivityUpdater:
         Returns:
             辞書型のexternal_urls
         """
+        # APIレスポンスは既に辞書型なので、例外処理の外で即座に返す
+        if isinstance(external_urls_raw, dict):
+            return external_urls_raw
+        
         try:
-            # 既に辞書型の場合はそのまま返す
-            if isinstance(external_urls_raw, dict):
-                return external_urls_raw
-            
             # 文字列の場合はJSONパース
             if isinstance(external_urls_raw, str):
                 if external_urls_raw.strip():  # 空文字列でない場合
-                    parsed = json.loads(external_urls_raw)
-                    self.logger.debug(f"JSON文字列をパースしました: {parsed}")
-                    return parsed
+                    return json.loads(external_urls_raw)
                 else:
                     return {}
             
@@ -784,6 +1177,11 @@ class SpotifyActivityUpdater:
         """
         content_parts = []
         
+        # SVGはハッシュ付きのファイル名で保存されるため、実際に保存したパスを参照する
+        # （保存できていない場合は update_readme 側で中断済み）
+        latest_svg_path = self.svg_paths["latest_track.svg"]
+        ranking_svg_path = self.svg_paths["track_ranking.svg"]
+        
         # 最新トラックセクション
         content_parts.append("## 🎧 いま聴いてる")
         content_parts.append("")
@@ -794,11 +1192,11 @@ class SpotifyActivityUpdater:
             spotify_url = external_urls.get('spotify', '')
             
             if spotify_url:
-                content_parts.append(f"[![Latest Track](SVG/latest_track.svg)]({spotify_url})")
+                content_parts.append(f"[![Latest Track]({latest_svg_path})]({spotify_url})")
             else:
-                content_parts.append("![Latest Track](SVG/latest_track.svg)")
+                content_parts.append(f"![Latest Track]({latest_svg_path})")
         else:
-            content_parts.append("![Latest Track](SVG/latest_track.svg)")
+            content_parts.append(f"![Latest Track]({latest_svg_path})")
         
         content_parts.append("")
         
@@ -813,11 +1211,11 @@ class SpotifyActivityUpdater:
             spotify_url = external_urls.get('spotify', '')
             
             if spotify_url:
-                content_parts.append(f"[![Track Ranking](SVG/track_ranking.svg)]({spotify_url})")
+                content_parts.append(f"[![Track Ranking]({ranking_svg_path})]({spotify_url})")
             else:
-                content_parts.append("![Track Ranking](SVG/track_ranking.svg)")
+                content_parts.append(f"![Track Ranking]({ranking_svg_path})")
         else:
-            content_parts.append("![Track Ranking](SVG/track_ranking.svg)")
+            content_parts.append(f"![Track Ranking]({ranking_svg_path})")
         
         return "\n".join(content_parts)
     
@@ -836,55 +1234,66 @@ class SpotifyActivityUpdater:
             
             # SVGファイルを生成
             self.logger.info("SVGファイルの生成を開始...")
-            self.format_latest_track(latest_track)
-            self.format_track_ranking(ranking)
+            # 2枚のSVGはそれぞれ画像取得を伴うため並行して生成
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                latest_future = executor.submit(self.format_latest_track, latest_track)
+                ranking_future = executor.submit(self.format_track_ranking, ranking)
+                latest_future.result()
+                ranking_future.result()
+            
+            # SVGの保存に失敗したカードがあれば、存在しないファイルを参照しないようREADME.mdを更新しない
+            missing_svgs = [name for name in ("latest_track.svg", "track_ranking.svg") if name not in self.svg_paths]
+            if missing_svgs:
+                raise Exception(f"SVGファイルを保存できなかったため、README.mdを更新しません: {', '.join(missing_svgs)}")
             self.logger.info("SVGファイルの生成が完了しました")
             
-            # 既存のREADME.mdを読み込み
-            with open(readme_path, 'r', encoding='utf-8') as f:
+            # 既存のREADME.mdを読み込み（マーカー検索と置換はバイト列のまま行い、全体のデコード/エンコードを省く）
+            with open(readme_path, 'rb') as f:
                 content = f.read()
             
-            # Spotifyセクションの開始と終了マーカー
-            start_marker = "<!-- SPOTIFY_ACTIVITY_START -->"
-            end_marker = "<!-- SPOTIFY_ACTIVITY_END -->"
-            
             # Spotifyコンテンツを生成
-            spotify_content = self._generate_spotify_content(latest_track, ranking)
+            spotify_content = self._generate_spotify_content(latest_track, ranking).encode('utf-8')
             
-            # 既存のSpotifyセクションを検索
-            start_pos = content.find(start_marker)
-            end_pos = content.find(end_marker)
+            # 既存のSpotifyセクションとActivitiesセクションを1回の走査で検索
+            positions = [-1, -1, -1]
+            for match in _README_MARKERS_RE.finditer(content):
+                index = match.lastindex - 1
+                if positions[index] == -1:
+                    positions[index] = match.start()
+            start_pos, end_pos, activities_pos = positions
             
+            # 中間文字列を作らないよう、断片を集めて最後に一度だけ結合する
+            section = (_SECTION_START_BYTES, b"\n", spotify_content, b"\n", _SECTION_END_BYTES)
             if start_pos != -1 and end_pos != -1:
                 # 既存のセクションを置換
-                new_content = (
-                    content[:start_pos] + 
-                    start_marker + "\n" + 
-                    spotify_content + "\n" + 
-                    end_marker + 
-                    content[end_pos + len(end_marker):]
-                )
+                new_content = b"".join((
+                    content[:start_pos],
+                    *section,
+                    content[end_pos + _SECTION_END_LEN:]
+                ))
                 self.logger.info("既存のSpotifyセクションを置換しました")
             else:
                 # 新しいセクションを追加（Activitiesセクションの前に挿入）
-                activities_pos = content.find("## 🏃‍♀️ Activities")
                 if activities_pos != -1:
-                    new_content = (
-                        content[:activities_pos] + 
-                        start_marker + "\n" + 
-                        spotify_content + "\n" + 
-                        end_marker + "\n\n" + 
+                    new_content = b"".join((
+                        content[:activities_pos],
+                        *section,
+                        b"\n\n",
                         content[activities_pos:]
-                    )
+                    ))
                     self.logger.info("Activitiesセクションの前にSpotifyセクションを追加しました")
                 else:
                     # Activitiesセクションが見つからない場合は末尾に追加
-                    new_content = content + "\n\n" + start_marker + "\n" + spotify_content + "\n" + end_marker
+                    new_content = b"".join((content, b"\n\n", *section))
                     self.logger.info("ファイル末尾にSpotifyセクションを追加しました")
             
-            # ファイルに書き込み
-            with open(readme_path, 'w', encoding='utf-8') as f:
-                f.write(new_content)
+            # 内容に変化がなければ書き込まない（不要なコミットを防ぐ）
+            if new_content == content:
+                self.logger.info("README.mdに変更がないため書き込みをスキップしました")
+                return
+            
+            # ファイルに書き込み（途中で失敗してもREADME.mdが壊れないよう一時ファイル経由で置換）
+            self._write_file_atomic(readme_path, new_content)
             
             self.logger.info("README.mdが正常に更新されました")
             
@@ -896,17 +1305,22 @@ class SpotifyActivityUpdater:
     def run(self):
         """メイン実行関数"""
         try:
-            self.logger.info("最新トラックの取得を開始...")
-            latest = self.get_latest_track()
+            # 最新トラックとランキングは独立しているため並行して取得
+            self.logger.info("最新トラックと楽曲ランキングの取得を開始...")
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                latest_future = executor.submit(self.get_latest_track)
+                ranking_future = executor.submit(self.get_track_ranking, limit=3)
+                latest = latest_future.result()
+                ranking = ranking_future.result()
             self.logger.info("最新トラックの取得が完了しました")
-
-            self.logger.info("楽曲ランキングの取得を開始...")
-            ranking = self.get_track_ranking(limit=3)
             self.logger.info(f"{len(ranking)}曲のランキングを取得しました（short_term期間）")
             
             self.logger.info("README.mdの更新を開始...")
             self.update_readme(latest, ranking)
             
+            self._save_oembed_cache()
+            self._prune_image_cache()
+            
             self.logger.info("すべての処理が完了しました！")
             
         except Exception as e:
@@ -917,10 +1331,15 @@ class SpotifyActivityUpdater:
 
 def main():
     """メイン関数"""
+    # ログ設定（ハンドラの設定はプロセスで一度だけ行う）
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     load_dotenv()
     
     updater = SpotifyActivityUpdater()
-    updater.run()
+    try:
+        updater.run()
+    finally:
+        updater.close()
 
 
 if __name__ == "__main__":